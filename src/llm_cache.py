@@ -0,0 +1,33 @@
+import hashlib
+import json
+import threading
+from cachetools import TTLCache
+
+
+class LLMCache:
+    """Exact-match response cache for deterministic chat-completion calls.
+
+    Keys are a sha256 over (model, messages, temperature) so identical
+    requests skip the network round trip entirely. Access is guarded by a
+    lock since callers may run in to_thread workers.
+    """
+
+    def __init__(self, maxsize=1024, ttl=86400):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(model, messages, temperature=0.0):
+        payload = json.dumps(
+            {'model': model, 'messages': messages, 'temperature': temperature},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).digest()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
@@ -4,15 +4,19 @@ It contains the code for initializing the bot, handling events, and interacting
 The code includes functions for saving and updating the database, handling message events, and downloading images.
 It also defines a custom view class for displaying confirmation prompts and a view for sending messages to the appropriate channel.
 """
+import io
 import logging
 import os
-import json
 import re
+import sqlite3
+import threading
 import traceback
 from typing import Dict
+import aiofiles
 import aiohttp
 import discord
 import elevenlabs
+import httpx
 from discord import (
     Interaction,
     Message as DiscordMessage,
@@ -22,14 +26,14 @@ from discord import (
     NotFound,
     Option,
 )
-from discord.utils import get as discord_get
 import asyncio
+from collections import deque
 from uuid import uuid4
 from time import time
-from openai import OpenAI
+from openai import AsyncOpenAI
 import google.generativeai as genai
+import orjson
 from mistralai.client import MistralClient
-from mistralai.models.chat_completion import ChatMessage
 from PIL import Image
 from src.base import Message, Conversation, Prompt
 from src.constants import (
@@ -58,8 +62,9 @@ from src.utils import (
 from src import completion
 from src.memory import (
     gpt3_embedding,
-    save_json,
+    append_chat_log,
     load_convo,
+    log_message,
     add_notes,
     notes_history,
     fetch_memories,
@@ -72,18 +77,35 @@ logging.basicConfig(
 )
 
 try:
-    with open("database.json", "r") as f:
-        database = json.load(f)
-    print(f"Database loaded!")
-except FileNotFoundError:
-    print("Database not found. Creating new database...")
-    database = {
-        "Guilds": {},
-        "message_history": {},
-    }
-    with open("database.json", "w") as f:
-        json.dump(database, f, indent=4)
+    import uvloop
+    uvloop.install()
+    print("uvloop installed!")
+except ImportError:
+    pass  # uvloop is POSIX-only; fall back to the default event loop
+
+# check_same_thread=False because save_database runs in to_thread workers;
+# db_lock serializes those writes
+db = sqlite3.connect("database.sqlite", isolation_level=None, check_same_thread=False)
+db_lock = threading.Lock()
+db.execute("PRAGMA journal_mode=WAL")
+db.execute("PRAGMA synchronous=NORMAL")
+db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT)")
+database = {key: orjson.loads(value) for key, value in db.execute("SELECT key, value FROM kv")}
+if not database:
+    if os.path.exists("database.json"):
+        print("Migrating database.json into database.sqlite...")
+        with open("database.json", "rb") as f:
+            database = orjson.loads(f.read())
+    else:
+        print("Database not found. Creating new database...")
+        database = {
+            "Guilds": {},
+            "message_history": {},
+        }
+    for key, value in database.items():
+        db.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (key, orjson.dumps(value).decode()))
     print("Database created!")
+print(f"Database loaded!")
 
 
 llm_provider = "openai"
@@ -95,14 +117,26 @@ mistral = MistralClient(api_key=MISTRAL_API_KEY)
 print(f'Mistral API Key: "{MISTRAL_API_KEY}"')
 genai.configure(api_key=GOOGLE_AI_KEY)
 print(f'Google AI API Key: "{GOOGLE_AI_KEY}"')
-openai = OpenAI(api_key=OPENAI_API_KEY)
+# Tuned pool so concurrent completions reuse keep-alive connections instead of
+# opening a fresh TLS handshake per burst
+openai = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=httpx.Timeout(60, connect=5),
+    ),
+)
 print(f'OpenAI API Key: "{openai.api_key}"')
 elevenlabs.set_api_key(ELEVENLABS_API_KEY)
 print(f'ElevenLabs API Key: "{elevenlabs.get_api_key()}"')
 images_folder = "images"
 edit_mask = f"{images_folder}/mask.png"
+if not os.path.exists(edit_mask):
+    Image.new("RGBA", (1024, 1024), (0, 0, 0, 0)).save(edit_mask)
+    print("Created edit mask!")
 print(f'Edit Mask Path: "{edit_mask}"')
 disconnect_time = None
+http_session = None
 current_messages = {}
 streamMode = False
 print(f'Stream Mode: "{streamMode}"')
@@ -111,6 +145,10 @@ botActivity = ActivityType.playing
 MAX_HISTORY = 15
 systemPromptStr = f"INSTRUCTIONS: {BOT_INSTRUCTIONS}\n Previous Messages: \n"
 message_history: Dict[int, genai.ChatSession] = {}
+thread_history: Dict[int, deque] = {}
+_examples_built_for = None
+MENTION_RE = re.compile(r"<@(\d+)>")
+STAR_RE = re.compile(r"\*.*?\*")
 
 
 text_model = genai.GenerativeModel(
@@ -121,24 +159,19 @@ image_model = genai.GenerativeModel(model_name="gemini-pro-vision",
 
 # ---------------------------------------------Database-------------------------------------------------
 
-async def save_database_loop():
+def save_database(key=None):
     """
-    Continuously saves the database to a JSON file every 2 minutes.
+    Save the database to SQLite.
+    Writes each top-level key of the `database` variable as a row in the `kv` table,
+    or only the given key if one is passed. WAL mode keeps these writes O(1) per row.
     """
-    while True:
-        with open("database.json", "w") as f:
-            json.dump(database, f, indent=4)
-        await asyncio.sleep(120)
-
-
-def save_database():
-    """
-    Save the database to a JSON file.
-    This function saves the contents of the `database` variable to a JSON file named 'database.json'.
-    The file is written with an indentation of 4 spaces.
-    """
-    with open("database.json", "w") as f:
-        json.dump(database, f, indent=4)
+    if key is None:
+        items = database.items()
+    else:
+        items = [(key, database[key])]
+    with db_lock:
+        for k, v in items:
+            db.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (k, orjson.dumps(v).decode()))
     print("Database saved!")
 
 
@@ -235,7 +268,9 @@ async def on_disconnect():
     Saves the database, records the disconnect time, and logs the event.
     """
     global disconnect_time
-    save_database()
+    await asyncio.to_thread(save_database)
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
     disconnect_time = asyncio.get_event_loop().time()
     print(f"BOT DISCONNECTED AT {int(disconnect_time)}")
 
@@ -247,22 +282,29 @@ async def on_ready():
     It performs various initialization tasks such as setting up the bot's presence,
     creating necessary roles, and adding guilds to the database.
     """
-    global disconnect_time
+    global disconnect_time, _examples_built_for
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
     print(BOT_INVITE_URL)
     bot.loop.create_task(check_disconnect_time())
-    completion.MY_BOT_NAME = bot.user.name
-    completion.MY_BOT_EXAMPLE_CONVOS = []
-    for c in EXAMPLE_CONVOS:
-        messages = []
-        for m in c.messages:
-            if m.user == BOT_NAME:
-                messages.append(Message(user=bot.user.name, text=m.text))
-            else:
-                messages.append(m)
-        completion.MY_BOT_EXAMPLE_CONVOS.append(Conversation(messages=messages))
-    bot.loop.create_task(save_database_loop())
-    print("Database Autosave Started!")
+    if _examples_built_for != bot.user.name:
+        name = bot.user.name
+        completion.MY_BOT_NAME = name
+        completion.MY_BOT_EXAMPLE_CONVOS = [
+            Conversation(messages=[
+                Message(user=name, text=m.text) if m.user == BOT_NAME else m
+                for m in c.messages
+            ])
+            for c in EXAMPLE_CONVOS
+        ]
+        completion.PRERENDERED_PREFIX = Prompt(
+            header=Message(
+                "System", f"Instructions for {MY_BOT_NAME}: {BOT_INSTRUCTIONS}"
+            ),
+            examples=completion.MY_BOT_EXAMPLE_CONVOS,
+            convo=Conversation(messages=[]),
+        ).render()
+        _examples_built_for = bot.user.name
+    admin_role_name = f"{bot.user.name} Admin"
     for guild in bot.guilds:
         guild_id = str(guild.id)
         print(f"Guild: {guild.name} (ID: {guild_id})")
@@ -276,29 +318,30 @@ async def on_ready():
         if ("name" not in database["Guilds"][guild_id]) or (guild.name not in database["Guilds"][guild_id]["name"]):
             database["Guilds"][guild_id]["name"] = guild.name
         try:
-            role = discord_get(guild.roles, name=f"{bot.user.name} Admin")
-            owner = await guild.fetch_member(OWNER_ID)
+            roles_by_name = {r.name: r for r in guild.roles}
+            role = roles_by_name.get(admin_role_name)
+            owner = guild.get_member(int(OWNER_ID)) or await guild.fetch_member(OWNER_ID)
             if owner is None:
                 print(f"Owner not found in guild!")
                 return
             if role is not None:
                 print(f"Role ({role.name}) found in guild! Refreshing role...")
                 await role.delete()
-                role = await guild.create_role(name=f"{bot.user.name} Admin", permissions=discord.Permissions(administrator=True))
+                role = await guild.create_role(name=admin_role_name, permissions=discord.Permissions(administrator=True))
                 print(f"Recreated Role ({role.name})!")
                 if owner is not None:
                     print(f"Found {owner.name} (ID: {OWNER_ID}) in guild!")
                     await owner.add_roles(role)
-                    print(f"Added role ({bot.user.name} Admin) to {owner.name}!")
+                    print(f"Added role ({admin_role_name}) to {owner.name}!")
                 else:
                     print(f"Owner not found in guild!")
             if role is None:
-                role = await guild.create_role(name=f"{bot.user.name} Admin", permissions=discord.Permissions(administrator=True))
+                role = await guild.create_role(name=admin_role_name, permissions=discord.Permissions(administrator=True))
                 print(f"Role ({role.name}) Not Found. Created Role!")
                 if owner is not None:
                     print(f"Found {owner.name} (ID: {OWNER_ID}) in guild!")
                     await owner.add_roles(role)
-                    print(f"Added role ({bot.user.name} Admin) to {owner.name}!")
+                    print(f"Added role ({admin_role_name}) to {owner.name}!")
                 else:
                     print(f"Owner not found in guild!")
         except Exception:
@@ -332,6 +375,17 @@ async def on_guild_join(guild):
     print(f"Created channels in new guild {guild.name} (ID: {guild.id})")
 
 
+def get_session():
+    """
+    Returns the shared aiohttp session, creating it lazily on first use or
+    after it has been closed (e.g. across reconnects).
+    """
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300))
+    return http_session
+
+
 async def download_image(url: str, images_folder: str, filename: str):
     """
     Downloads an image from the given URL and saves it to the specified folder with the given filename.
@@ -342,11 +396,10 @@ async def download_image(url: str, images_folder: str, filename: str):
     Returns:
     None
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            image_data = await resp.read()
-    with open(os.path.join(images_folder, f"{filename}"), "wb") as f:
-        f.write(image_data)
+    async with get_session().get(url) as resp:
+        async with aiofiles.open(os.path.join(images_folder, f"{filename}"), "wb") as f:
+            async for chunk in resp.content.iter_chunked(65536):
+                await f.write(chunk)
     print(f"Downloaded image from {url} and saved to {images_folder}/{filename}")
 
 
@@ -368,6 +421,25 @@ async def check_admin_permissions(ctx):
     return True
 
 
+async def fetch_thread_history(channel, exclude_ids=()):
+    """
+    Fetches the recent channel history as a chronological deque of converted Messages.
+    Parameters:
+    - channel: The channel or thread to read history from.
+    - exclude_ids: Message ids to skip, e.g. the bot's in-flight placeholder.
+    Returns:
+    - deque: The converted messages, oldest first.
+    """
+    history = deque(maxlen=MAX_MESSAGE_HISTORY)
+    async for msg in channel.history(limit=MAX_MESSAGE_HISTORY):
+        if msg.id in exclude_ids:
+            continue
+        converted = discord_message_to_message(msg)
+        if converted is not None:
+            history.appendleft(converted)
+    return history
+
+
 async def messageInNamedChannel(message: DiscordMessage, name: str):
     """
     Checks if a message is in a channel with a specific name.
@@ -384,7 +456,7 @@ async def messageInNamedChannel(message: DiscordMessage, name: str):
         return False
 
 
-async def updateDatabase(key, value):
+def updateDatabase(key, value):
     """
     Updates the database with the given key-value pair.
     Args:
@@ -394,7 +466,7 @@ async def updateDatabase(key, value):
         None
     """
     database[key] = value
-    await save_database()
+    save_database(key)
     print(f"Updated database with {key}: {value}")
 
 
@@ -445,10 +517,68 @@ class ConfirmView(discord.ui.View):
         self.stop()
 
 
+per_user_locks: Dict[int, asyncio.Semaphore] = {}
+per_user_pending: Dict[int, int] = {}
+# Strong references to in-flight handler tasks; the event loop only keeps
+# weak ones, so an unreferenced task can be garbage-collected mid-run
+background_tasks = set()
+
+
 @bot.event
 async def on_message(message: DiscordMessage):
     """
     Event handler for when a message is received.
+    Filters out non-target traffic first, then spawns a task per message so
+    long completions don't block other users; a per-user semaphore keeps one
+    user from stacking up concurrent requests.
+
+    Args:
+    - message (DiscordMessage): The message object.
+
+    Returns:
+    - None
+    """
+    if (message.author == bot.user) or message.author.bot or message.author.system or message.mention_everyone:
+        return
+    # Cheap gate before any task or lock churn: unrelated chatter must not
+    # queue behind a user's in-flight completion
+    content = message.content
+    if not content or content[0] == "?":
+        return
+    channel = message.channel
+    ctype = channel.type
+    TextChannel = ctype is discord.ChannelType.text
+    PublicThread = ctype is discord.ChannelType.public_thread
+    mentioned = bot.user.id in (u.id for u in message.mentions)
+    is_gloved_gpt = TextChannel and channel.name == "gloved-gpt"
+    if not (is_gloved_gpt or isinstance(channel, discord.DMChannel) or mentioned or (PublicThread and channel.parent.name == "gloved-gpt")):
+        return
+    author_id = message.author.id
+    lock = per_user_locks.setdefault(author_id, asyncio.Semaphore(1))
+    per_user_pending[author_id] = per_user_pending.get(author_id, 0) + 1
+    task = asyncio.create_task(bounded_handle_message(lock, message))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def bounded_handle_message(lock: asyncio.Semaphore, message: DiscordMessage):
+    author_id = message.author.id
+    try:
+        async with lock:
+            await handle_message(message)
+    finally:
+        # Drop the semaphore once this user has no queued work so the map
+        # doesn't grow with every author ever seen
+        per_user_pending[author_id] -= 1
+        if per_user_pending[author_id] == 0:
+            del per_user_pending[author_id]
+            per_user_locks.pop(author_id, None)
+
+
+async def handle_message(message: DiscordMessage):
+    """
+    Processes a single user message: memory lookup, prompt construction,
+    completion streaming, and the optional voice reply.
 
     Args:
     - message (DiscordMessage): The message object.
@@ -457,30 +587,20 @@ async def on_message(message: DiscordMessage):
     - None
     """
     global current_messages
-    old_message_id = None
-    old_message = None
+    content = message.content
     OriginalMessage = message
-    OriginalMessageID = int(OriginalMessage.id)
     OriginalChannel = OriginalMessage.channel
-    OriginalChannelID = int(OriginalChannel.id)
-    if (message.author == bot.user) or message.author.bot or message.author.system or message.mention_everyone:
-        return
     channel = OriginalChannel
-    # if message.channel.id in current_messages:
-    #     old_message_id = current_messages[message.channel.id]
-    #     old_message = await message.channel.fetch_message(old_message_id)
-    #     if old_message:
-    #         await old_message.delete()
-    TextChannel = channel.type == discord.ChannelType.text
+    ctype = channel.type
+    TextChannel = ctype is discord.ChannelType.text
+    PublicThread = ctype is discord.ChannelType.public_thread
+    mentioned = bot.user.id in (u.id for u in message.mentions)
     interactive_response = None
-    MentionContent = message.content.removeprefix("<@938447947857821696> ")
+    MentionContent = content.removeprefix("<@938447947857821696> ")
+    is_gloved_gpt = TextChannel and channel.name == "gloved-gpt"
     try:
-        if message.content.startswith("?"):
-            return
         thinkingText = "**```Processing Message...```**"
-        # if not (TextChannel and message.channel.name == "gloved-gpt") and not (isinstance(message.channel, discord.DMChannel) or bot.user.mentioned_in(message) or (message.channel.type in {discord.ChannelType.public_thread} and message.channel.parent.name == "gloved-gpt")):
-        #     return
-        if TextChannel and message.channel.name == "gloved-gpt":
+        if is_gloved_gpt:
             guild_id = str(message.guild.id)
             author_id = str(message.author.id)
             guild_data = database["Guilds"][guild_id]
@@ -500,13 +620,16 @@ async def on_message(message: DiscordMessage):
                 if user_data["counter"] > 3:
                     user_data["counter"] = 1
             threads = user_threads[author_id]["threads"]
-            for thread in threads:
-                try:
-                    await bot.fetch_channel(thread["thread_id"])
-                    print(f'Discord thread (ID: {thread["thread_id"]}) found in database!')
-                except NotFound:
-                    print(f'Discord thread (ID: {thread["thread_id"]}) not found! Removing from database...')
-                    threads.remove(thread)
+            missing = [t for t in threads if bot.get_channel(t["thread_id"]) is None]
+            if missing:
+                results = await asyncio.gather(
+                    *(bot.fetch_channel(t["thread_id"]) for t in missing),
+                    return_exceptions=True,
+                )
+                dead = {t["thread_id"] for t, r in zip(missing, results) if isinstance(r, NotFound)}
+                for thread_id in dead:
+                    print(f'Discord thread (ID: {thread_id}) not found! Removing from database...')
+                threads = [t for t in threads if t["thread_id"] not in dead]
             user_threads[author_id]["threads"] = threads
             if len(threads) >= 3:
                 view = ConfirmView()
@@ -528,12 +651,12 @@ async def on_message(message: DiscordMessage):
                 else:
                     await confirmMessage.delete()
                     return
-            createdThread = None
-            try:
-                NewThread = await bot.fetch_channel(message.id)
+            # Check the gateway cache first; fetch_channel costs a REST round trip
+            # that raises NotFound on every fresh message
+            createdThread = message.thread or bot.get_channel(message.id)
+            if createdThread is not None:
                 print("Thread already created!")
-                createdThread = NewThread
-            except Exception:
+            else:
                 try:
                     createdThread = await message.create_thread(name=thread_name)
                 except Exception as e:
@@ -543,20 +666,13 @@ async def on_message(message: DiscordMessage):
                 return
             threads.append({"thread_id": createdThread.id, "message_id": message.id})
             user_threads[author_id]["threads"] = threads
-            save_database()
+            await asyncio.to_thread(save_database, "Guilds")
             interactive_response = await createdThread.send(thinkingText)
             print("Thread Created!")
-        elif isinstance(message.channel, discord.DMChannel) or bot.user.mentioned_in(message) or (message.channel.type in {discord.ChannelType.public_thread} and message.channel.parent.name == "gloved-gpt"):
+        else:
             print("Message is DM or User Thread. Processing...")
             interactive_response = await channel.send(thinkingText)
-        else:
-            return
-        try:
-            message = await channel.fetch_message(message.id)
-        except NotFound:
-            interactive_response.delete()
-            return
-        channel = await bot.fetch_channel(interactive_response.channel.id)
+        channel = interactive_response.channel
         current_messages[channel.id] = str(message.id)
         current_messages[message.channel.id] = interactive_response.id
         if llm_provider == "google":
@@ -595,21 +711,25 @@ async def on_message(message: DiscordMessage):
                     # Split the Message so discord does not get upset
                     await split_and_send_messages(interactive_response, response_text, 1700)
                     del current_messages[channel.id]
-                    thinkingText = "**```Response Finished!```** \n"
-                    responseReply = await message.reply(thinkingText)
+                    await message.add_reaction("✅")
                     print("Full Response Sent!")
-                    await asyncio.sleep(0.5)
-                    await responseReply.delete()
                     return
-        message = await OriginalChannel.fetch_message(OriginalMessageID)
-        if bot.user.mentioned_in(message):
+        if mentioned:
             message.content = message.content.removeprefix("<@938447947857821696> ")
         print("Embedding Message!")
-        vector = gpt3_embedding(message)
+        # Overlap the embedding round-trip with the Discord history fetch for new threads
+        embed_task = asyncio.create_task(asyncio.to_thread(gpt3_embedding, message))
+        history_task = None
+        # Exclude the placeholder (still showing its thinking text) and the current
+        # message, which is appended in converted form below
+        seed_excludes = {interactive_response.id, message.id}
+        if not TextChannel and channel.id not in thread_history:
+            history_task = asyncio.create_task(fetch_thread_history(channel, seed_excludes))
         timestamp = time()
-        timestring = timestring = timestamp_to_datetime(timestamp)
+        timestring = timestamp_to_datetime(timestamp)
         user = message.author.name
         extracted_message = "%s: %s - %s" % (user, timestring, MentionContent)
+        vector = await embed_task
         info = {
             "speaker": user,
             "timestamp": timestamp,
@@ -618,14 +738,14 @@ async def on_message(message: DiscordMessage):
             "message": extracted_message,
             "timestring": timestring,
         }
-        filename = "log_%s_user" % timestamp
-        save_json(f"./src/chat_logs/{filename}.json", info)
-        history = load_convo()
+        await asyncio.to_thread(append_chat_log, info)
+        log_message(info)
+        history = await asyncio.to_thread(load_convo)
         print("Loading Memories!")
         thinkingText = "**```Loading Memories...```**"
         await interactive_response.edit(content=thinkingText)
-        memories = fetch_memories(vector, history, 5)
-        current_notes, vector = summarize_memories(memories)
+        memories = await asyncio.to_thread(fetch_memories, vector, history, 5)
+        current_notes, vector = await asyncio.to_thread(summarize_memories, memories)
         print(current_notes)
         print(
             "-------------------------------------------------------------------------------"
@@ -650,36 +770,45 @@ async def on_message(message: DiscordMessage):
         await interactive_response.edit(content=thinkingText)
         if not TextChannel:
             print("Public Thread Message Recieved!")
-            channel_messages = [
-                discord_message_to_message(msg)
-                async for msg in message.channel.history(limit=MAX_MESSAGE_HISTORY)
-            ]
+            history = thread_history.get(channel.id)
+            if history is None:
+                # Seed the rolling history once per thread; afterwards it is kept updated in-process
+                history = await (history_task or fetch_thread_history(channel, seed_excludes))
+                thread_history[channel.id] = history
+            converted = discord_message_to_message(message)
+            if converted is not None:
+                history.append(converted)
+            channel_messages = list(history)
         else:
-            channel_messages = [discord_message_to_message(message)]
+            channel_messages = [x for x in [discord_message_to_message(message)] if x is not None]
         if message.thread is None:
             print("Thread Message Recieved!")
             print(message.content)
-        channel_messages = [x for x in channel_messages if x is not None]
-        channel_messages.reverse()
-        channel_messages.insert(0, message_notes)
-        if context_notes:
-            channel_messages.insert(0, context_notes)
-        timestamp = time()
-        timestring = timestring = timestamp_to_datetime(timestamp)
-        prompt = Prompt(
-            header=Message(
-                "System", f"Instructions for {MY_BOT_NAME}: {BOT_INSTRUCTIONS}"
-            ),
-            examples=MY_BOT_EXAMPLE_CONVOS,
-            convo=Conversation(
-                channel_messages + [Message(f"{timestring} {MY_BOT_NAME}")]
-            ),
+        prefix = [context_notes, message_notes] if context_notes else [message_notes]
+        channel_messages = prefix + channel_messages
+        convo = Conversation(
+            channel_messages + [Message(f"{timestring} {MY_BOT_NAME}")]
         )
-        rendered = prompt.render()
-        mentions = re.findall(r"<@(\d+)>", rendered)
-        for mention in mentions:
-            user = await bot.fetch_user(mention)
-            rendered = rendered.replace(f"<@{mention}>", user.name)
+        rendered = completion.PRERENDERED_PREFIX + convo.render()
+        mention_names = {}
+        missing_mentions = []
+        for mention in set(MENTION_RE.findall(rendered)):
+            cached = bot.get_user(int(mention))
+            if cached is not None:
+                mention_names[mention] = cached.name
+            else:
+                missing_mentions.append(mention)
+        if missing_mentions:
+            fetched = await asyncio.gather(
+                *(bot.fetch_user(mention) for mention in missing_mentions),
+                return_exceptions=True,
+            )
+            mention_names.update({
+                mention: fetched_user.name
+                for mention, fetched_user in zip(missing_mentions, fetched)
+                if not isinstance(fetched_user, Exception)
+            })
+        rendered = MENTION_RE.sub(lambda m: mention_names.get(m.group(1), m.group(0)), rendered)
         rendered.replace(f"<|endoftext|>GlovedBot: **```Reading Previous Messages...```**", "")
         print(rendered)
         print("Prompt Rendered!")
@@ -704,7 +833,7 @@ async def on_message(message: DiscordMessage):
         #         interactive_response = await channel.send(msg)
         #         print("Message character limit reached. Sending chunk.")
         # if llm_provider == "openai":
-        completions = openai.chat.completions.create(
+        completions = await openai.chat.completions.create(
             model="gpt-4",
             messages=[{"role": "system", "content": rendered}],
             temperature=1.0,
@@ -714,55 +843,72 @@ async def on_message(message: DiscordMessage):
             print("Stream Mode Off")
             full_reply_content = completions.choices[0].message.content
             full_reply_content_combined = ""
-            reply_content = [
+            chunks = (
                 full_reply_content[i: i + 2000]
                 for i in range(0, len(full_reply_content), 2000)
-            ]
-            await interactive_response.edit(content=reply_content[0])
-            for msg in reply_content[1:]:
-                interactive_response = await channel.send(msg)
+            )
+            await interactive_response.edit(content=next(chunks))
+            # Send trailing chunks one at a time so they render in order
+            for chunk in chunks:
+                interactive_response = await channel.send(chunk)
                 print("Message character limit reached. Sending chunk.")
         else:
             print("Stream Mode On")
-            collected_chunks = []
-            collected_messages = []
+            collected_parts = []
+            full_reply_content = ""
             full_reply_content_combined = ""
+            last_edit = time()
+            chars_since_edit = 0
             print("Getting chunks...")
-            for chunk in completions:
-                await asyncio.sleep(0.4)
-                collected_chunks.append(chunk)
-                chunk_message = chunk.choices[0].delta
-                if chunk_message.content is not None:
-                    collected_messages.append(chunk_message)
-                full_reply_content = "".join([m.content for m in collected_messages])
-                if full_reply_content and not full_reply_content.isspace():
-                    await interactive_response.edit(content=thinkingText + full_reply_content)
+            async for chunk in completions:
+                chunk_content = chunk.choices[0].delta.content
+                if not chunk_content:
+                    # Skip role-only and empty-content chunks entirely
+                    continue
+                collected_parts.append(chunk_content)
+                chars_since_edit += len(chunk_content)
+                # Coalesce edits so we stay under Discord's edit rate limit instead of editing per chunk
+                if time() - last_edit < 1.2 and chars_since_edit < 200:
+                    continue
+                full_reply_content = "".join(collected_parts)
+                # Split before the display edit: a coalesced flush can overshoot the
+                # 1950 threshold by a couple hundred chars, and any edit payload
+                # past Discord's 2000-char limit is a 400
                 if len(full_reply_content) > 1950:
-                    full_reply_content_combined = full_reply_content
-                    await interactive_response.edit(content=full_reply_content)
+                    head = full_reply_content[:1950]
+                    tail = full_reply_content[1950:]
+                    full_reply_content_combined += head
+                    await interactive_response.edit(content=head)
                     interactive_response = await channel.send(thinkingText)
-                    collected_messages = []
+                    collected_parts = [tail] if tail else []
                     print("Message character limit reached. Started new message.")
+                elif not full_reply_content.isspace():
+                    await interactive_response.edit(content=thinkingText + full_reply_content)
+                last_edit = time()
+                chars_since_edit = 0
+            full_reply_content = "".join(collected_parts)
+            # The last coalesced window may not have flushed yet; skip the final
+            # edit when nothing remains after a split, since edit(content="") is a 400
+            if full_reply_content and not full_reply_content.isspace():
+                await interactive_response.edit(content=full_reply_content)
         # else:
         #     print("No model found! Stopping...")
         #     return
         print("full_reply_content: " + full_reply_content)
-        await interactive_response.edit(content=full_reply_content)
+        if channel.id in thread_history:
+            thread_history[channel.id].append(Message(user=bot.user.name, text=full_reply_content))
         # del current_messages[channel.id]
         if len(current_messages) == 0:
             await bot.change_presence(
                 activity=Activity(type=botActivity, name=botActivityName)
             )
-        thinkingText = "**```Response Finished!```** \n"
-        responseReply = await message.reply(thinkingText)
+        await message.add_reaction("✅")
         print("Full Response Sent!")
-        await asyncio.sleep(0.5)
-        await responseReply.delete()
         voice = [None]
         user_id = message.author.id
         guild = message.guild
         if guild is not None:
-            member = await guild.fetch_member(user_id)
+            member = guild.get_member(user_id) or await guild.fetch_member(user_id)
             if member.voice is not None:
                 print("User is in a voice channel!")
                 voice[0] = member.voice
@@ -772,28 +918,26 @@ async def on_message(message: DiscordMessage):
             print("Voice Channel Found!")
             thinkingText = "**```Getting Voice...```** \n"
             gettingVoiceMsg = await interactive_response.reply(thinkingText)
-            full_reply_content_combined = "".join([full_reply_content_combined, full_reply_content])
-            full_reply_voice = re.sub(r"\*.*?\*", "", full_reply_content_combined)
+            full_reply_voice = STAR_RE.sub("", full_reply_content_combined + full_reply_content)
             print(f"Creating TTS for: {full_reply_voice}")
             try:
-                audio = elevenlabs.generate(
+                # Generate off the event loop and play straight from memory, no voice.mp3 round-trip
+                audio = await asyncio.to_thread(
+                    elevenlabs.generate,
                     text=full_reply_voice,
                     voice="Roetpv5aIoWbL37AfGp3",
                     model="eleven_multilingual_v2",
                 )
                 await gettingVoiceMsg.delete()
-                with open("voice.mp3", "wb") as f:
-                    f.write(audio)
                 voice_client = await voice_channel.connect()
                 await asyncio.sleep(0.5)
-                voice_client.play(FFmpegPCMAudio("voice.mp3", options=f'-filter:a "volume=2.0"'))
-                print("TTS Generated and Saved!")
+                voice_client.play(FFmpegPCMAudio(io.BytesIO(audio), pipe=True, options=f'-filter:a "volume=2.0"'))
+                print("TTS Generated!")
                 print("Playing Voice...")
                 while voice_client.is_playing():
                     await asyncio.sleep(1)
                 await voice_client.disconnect()
                 print("Voice Played!")
-                os.remove("voice.mp3")
             except Exception as e:
                 logger.error(f"Error generating or playing voice: {e}")
         else:
@@ -822,44 +966,42 @@ async def on_message(message: DiscordMessage):
 async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
     if str(payload.emoji) == ":loud_sound:":
         voice = [None]
-        guild = await bot.fetch_guild(payload.guild_id)
-        channel = await guild.get_channel(payload.channel_id)
+        guild = bot.get_guild(payload.guild_id) or await bot.fetch_guild(payload.guild_id)
+        channel = guild.get_channel(payload.channel_id) or await bot.fetch_channel(payload.channel_id)
         message = await channel.fetch_message(payload.message_id)
-        author = await bot.fetch_user(payload.user_id)
+        author = bot.get_user(payload.user_id) or await bot.fetch_user(payload.user_id)
         guild = message.guild
         if guild is not None:
-            member = await guild.fetch_member(user_id)
+            member = guild.get_member(payload.user_id) or await guild.fetch_member(payload.user_id)
             if member.voice is not None:
                 print("User is in a voice channel!")
                 voice[0] = member.voice
         if voice[0] is not None:
             user_id = message.author.id
-            voice_channel = voice.channel
+            voice_channel = voice[0].channel
             print("Voice Channel Found!")
             thinkingText = "**```Getting Voice...```** \n"
             gettingVoiceMsg = await message.reply(thinkingText)
-            full_reply_content_combined = message.content
-            full_reply_voice = re.sub(r"\*.*?\*", "", full_reply_content_combined)
+            full_reply_voice = STAR_RE.sub("", message.content)
             print(f"Creating TTS for: {full_reply_voice}")
             try:
-                audio = elevenlabs.generate(
+                # Generate off the event loop and play straight from memory, no voice.mp3 round-trip
+                audio = await asyncio.to_thread(
+                    elevenlabs.generate,
                     text=full_reply_voice,
                     voice="Roetpv5aIoWbL37AfGp3",
                     model="eleven_multilingual_v2",
                 )
                 await gettingVoiceMsg.delete()
-                with open("voice.mp3", "wb") as f:
-                    f.write(audio)
                 voice_client = await voice_channel.connect()
                 await asyncio.sleep(0.5)
-                voice_client.play(FFmpegPCMAudio("voice.mp3", options=f'-filter:a "volume=2.0"'))
-                print("TTS Generated and Saved!")
+                voice_client.play(FFmpegPCMAudio(io.BytesIO(audio), pipe=True, options=f'-filter:a "volume=2.0"'))
+                print("TTS Generated!")
                 print("Playing Voice...")
                 while voice_client.is_playing():
                     await asyncio.sleep(1)
                 await voice_client.disconnect()
                 print("Voice Played!")
-                os.remove("voice.mp3")
             except Exception as e:
                 logger.error(f"Error generating or playing voice: {e}")
         else:
@@ -1,17 +1,32 @@
 from time import time, sleep
 from datetime import datetime
+from collections import deque
 from uuid import uuid4
+import hashlib
 import re
+import threading
+from cachetools import TTLCache
 from numpy.linalg import norm
 import numpy as np
-import json
+import orjson
 import os
 from openai import OpenAI
+from src.llm_cache import LLMCache
 
 client = OpenAI(api_key=os.environ['OPENAI_API_KEY'])
 
 
 notes_history = []
+_embed_cache = TTLCache(maxsize=2000, ttl=3600)
+_completion_cache = LLMCache(maxsize=1024, ttl=86400)
+CONVO = deque(maxlen=1024)
+_convo_loaded = False
+CHAT_LOG_PATH = './src/chat_logs/chat.jsonl'
+_chat_log = None
+# Guards _embed_cache, CONVO and the chat log handle: these are touched from
+# to_thread workers and the loop thread concurrently, and cachetools/deque
+# are not thread-safe
+_memory_lock = threading.Lock()
 
 
 def open_file(filepath):
@@ -25,13 +40,13 @@ def save_file(filepath, content):
 
 
 def load_json(filepath):
-    with open(filepath, 'r', encoding='utf-8') as infile:
-        return json.load(infile)
+    with open(filepath, 'rb') as infile:
+        return orjson.loads(infile.read())
 
 
 def save_json(filepath, payload):
-    with open(filepath, 'w', encoding='utf-8') as outfile:
-        json.dump(payload, outfile, ensure_ascii=False, sort_keys=True, indent=2)
+    with open(filepath, 'wb') as outfile:
+        outfile.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
 
 
 def timestamp_to_datetime(unix_time):
@@ -40,8 +55,14 @@ def timestamp_to_datetime(unix_time):
 
 def gpt3_embedding(message, engine='text-embedding-ada-002'):
     content = message.content
-    response = client.embeddings.create(input=content, model=engine)
-    vector = response.data[0].embedding  # this is a normal list
+    key = hashlib.sha256(content.encode()).digest()
+    with _memory_lock:
+        vector = _embed_cache.get(key)
+    if vector is None:
+        response = client.embeddings.create(input=content, model=engine)
+        vector = response.data[0].embedding  # this is a normal list
+        with _memory_lock:
+            _embed_cache[key] = vector
     return vector
 
 
@@ -65,20 +86,26 @@ def similarity(v1, v2):
 
 
 def fetch_memories(vector, logs, count):
-    scores = list()
-    for i in logs:
+    if not logs:
+        return list()
+    # Score every log in one BLAS matmul instead of a Python loop of dot products
+    mat = np.asarray([i['vector'] for i in logs], dtype=np.float32)
+    query = np.asarray(vector, dtype=np.float32)
+    scores = (mat @ query) / (norm(mat, axis=1) * norm(query))
+    for idx, i in enumerate(logs):
         if vector == i['vector']:
             # skip this one because it is the same message
+            scores[idx] = -np.inf
+    count = min(count, len(logs))
+    top = np.argpartition(-scores, count - 1)[:count]
+    top = top[np.argsort(-scores[top])]
+    ordered = list()
+    for idx in top:
+        if np.isinf(scores[idx]):
             continue
-        score = similarity(i['vector'], vector)
-        i['score'] = score
-        scores.append(i)
-    ordered = sorted(scores, key=lambda d: d['score'], reverse=True)
-    try:
-        ordered = ordered[0:count]
-        return ordered
-    except:
-        return ordered
+        logs[idx]['score'] = float(scores[idx])
+        ordered.append(logs[idx])
+    return ordered
 
 
 def add_notes(notes):
@@ -87,15 +114,49 @@ def add_notes(notes):
     return notes
 
 
+def log_message(info):
+    with _memory_lock:
+        CONVO.append(info)
+
+
+def append_chat_log(info):
+    # Single append to one .jsonl file instead of a new JSON file per message
+    global _chat_log
+    with _memory_lock:
+        if _chat_log is None:
+            os.makedirs(os.path.dirname(CHAT_LOG_PATH), exist_ok=True)
+            _chat_log = open(CHAT_LOG_PATH, 'ab')
+        _chat_log.write(orjson.dumps(info) + b'\n')
+        _chat_log.flush()
+
+
 def load_convo():
-    files = os.listdir('./src/chat_logs')
-    files = [i for i in files if '.json' in i]  # filter out any non-JSON files
-    result = list()
-    for file in files:
-        data = load_json('./src/chat_logs/%s' % file)
-        result.append(data)
-    ordered = sorted(result, key=lambda d: d['timestring'], reverse=False)  # sort them all chronologically
-    return ordered
+    global _convo_loaded
+    with _memory_lock:
+        if not _convo_loaded:
+            # Seed the in-memory buffer from disk once; afterwards log_message keeps it current
+            files = os.listdir('./src/chat_logs')
+            files = [i for i in files if i.endswith('.json')]  # filter out any non-JSON files
+            result = list()
+            for file in files:
+                data = load_json('./src/chat_logs/%s' % file)
+                result.append(data)
+            if os.path.exists(CHAT_LOG_PATH):
+                with open(CHAT_LOG_PATH, 'rb') as infile:
+                    for line in infile:
+                        if line.strip():
+                            result.append(orjson.loads(line))
+            ordered = sorted(result, key=lambda d: d['timestring'], reverse=False)  # sort them all chronologically
+            existing = list(CONVO)
+            # Entries appended via log_message before the seed ran are already on disk;
+            # drop those from the disk pass so they don't end up in CONVO twice
+            seen = {entry['uuid'] for entry in existing}
+            ordered = [entry for entry in ordered if entry['uuid'] not in seen]
+            CONVO.clear()
+            CONVO.extend(ordered[-CONVO.maxlen:])
+            CONVO.extend(existing)
+            _convo_loaded = True
+        return list(CONVO)
 
 
 def load_context():
@@ -123,6 +184,10 @@ def gpt3_completion(prompt, engine='gpt-3.5-turbo', temp=0.0, top_p=1.0, tokens=
     max_retry = 5
     retry = 0
     prompt = prompt.encode(encoding='ASCII', errors='ignore').decode()
+    key = LLMCache.cache_key(engine, [{"role": "system", "content": prompt}], temp)
+    cached = _completion_cache.get(key)
+    if cached is not None:
+        return cached
     while True:
         try:
             response = client.chat.completions.create(model="gpt-3.5-turbo",
@@ -133,6 +198,7 @@ def gpt3_completion(prompt, engine='gpt-3.5-turbo', temp=0.0, top_p=1.0, tokens=
             text = re.sub('[\t ]+', ' ', text)
             filename = '%s_gpt3.txt' % time()
             save_file('./src/memories/%s' % filename, prompt + '\n\n==========\n\n' + text)
+            _completion_cache.set(key, text)
             return text
         except Exception as oops:
             retry += 1
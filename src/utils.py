@@ -1,4 +1,3 @@
-from numpy import not_equal
 from typing import Optional, List
 from discord import ChannelType, Message as DiscordMessage
 from src.base import Message